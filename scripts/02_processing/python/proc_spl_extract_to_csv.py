@@ -18,14 +18,13 @@
 #   extracted data.
 #
 # Dependencies:
-# - `pandas`
 # - `lxml`
 # ---
 
+import csv
 import os
 import re
-import glob
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from lxml import etree
 
 # ------------------------------
@@ -39,69 +38,115 @@ base_path = "."  # change to the parent folder where directories are
 pattern = re.compile(r"^20250801_[0-9a-fA-F\-]{36}$")
 
 # ------------------------------
-# Find matching directories
+# Output CSV
 # ------------------------------
-directories = [
-    d for d in os.listdir(base_path)
-    if os.path.isdir(os.path.join(base_path, d)) and pattern.match(d)
-]
-
-print(f"Found {len(directories)} matching directories.")
+OUTPUT_CSV = "spl_products_sections.csv"
+FIELDNAMES = ["file", "product_name", "section", "paragraph"]
 
 # ------------------------------
-# Namespace map for SPL XML
+# Namespace map and qualified tags for SPL XML
 # ------------------------------
-ns = {'hl7': 'urn:hl7-org:v3'}
+HL7_NS = 'urn:hl7-org:v3'
+ns = {'hl7': HL7_NS}
+NAME_TAG = f'{{{HL7_NS}}}name'
+SECTION_TAG = f'{{{HL7_NS}}}section'
+PARAGRAPH_TAG = f'{{{HL7_NS}}}paragraph'
+PRODUCT_TAG = f'{{{HL7_NS}}}manufacturedProduct'
 
-# ------------------------------
-# Data storage
-# ------------------------------
-records = []
+# Compiled once: etree.XPath caches the compiled expression, while
+# elem.find/xpath recompile the path on every call.
+TITLE_XP = etree.XPath('./hl7:title', namespaces=ns)
 
 # ------------------------------
-# Scan directories and XML files
+# Per-file extraction (runs on pool workers)
 # ------------------------------
-for dir_path in directories:
-    xml_files = glob.glob(os.path.join(base_path, dir_path, "*.xml"))
-
-    for xml_file in xml_files:
-        try:
-            tree = etree.parse(xml_file)
-        except Exception as e:
-            print(f"Error parsing {xml_file}: {e}")
-            continue
-
-        # ----------------------
-        # Extract product name
-        # ----------------------
-        product_name_nodes = tree.xpath(
-            ".//hl7:manufacturedProduct/hl7:manufacturedProduct/hl7:name",
-            namespaces=ns
-        )
-        product_name = product_name_nodes[0].text if product_name_nodes else None
-
-        # ----------------------
-        # Extract sections and paragraphs
-        # ----------------------
-        section_nodes = tree.xpath(".//hl7:section", namespaces=ns)
-        for sec in section_nodes:
-            title_nodes = sec.xpath("./hl7:title", namespaces=ns)
+def extract_records(xml_file):
+    """Parses one SPL XML file and returns its extracted records.
+
+    Uses a single iterparse pass filtered to the tags of interest rather
+    than building the full DOM and walking it again with xpath; processed
+    elements are cleared as soon as they end, so memory stays bounded by
+    the largest section rather than the whole document.
+    """
+    product_name = None
+    rows = []
+    try:
+        for event, elem in etree.iterparse(xml_file, events=('end',),
+                                           tag=(NAME_TAG, SECTION_TAG)):
+            if elem.tag == NAME_TAG:
+                # Product name lives at manufacturedProduct/manufacturedProduct/name.
+                parent = elem.getparent()
+                grandparent = parent.getparent() if parent is not None else None
+                if (product_name is None
+                        and parent is not None and parent.tag == PRODUCT_TAG
+                        and grandparent is not None and grandparent.tag == PRODUCT_TAG):
+                    product_name = elem.text
+                continue
+
+            title_nodes = TITLE_XP(elem)
             title = title_nodes[0].text if title_nodes else None
 
-            paragraph_nodes = sec.xpath(".//hl7:paragraph", namespaces=ns)
-            paragraphs = [p.text for p in paragraph_nodes if p.text]
+            for p in elem.iter(PARAGRAPH_TAG):
+                if p.text:
+                    rows.append((title, p.text))
 
-            for para in paragraphs:
-                records.append({
-                    "file": os.path.basename(xml_file),
-                    "product_name": product_name,
-                    "section": title,
-                    "paragraph": para
-                })
+            # Free the processed section and any fully-read siblings.
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+    except Exception as e:
+        print(f"Error parsing {xml_file}: {e}")
+        return []
 
-# ------------------------------
-# Create DataFrame and save CSV
-# ------------------------------
-df = pd.DataFrame(records)
-df.to_csv("spl_products_sections.csv", index=False)
-print(f"Saved {len(df)} records to spl_products_sections.csv")
+    return [
+        {
+            "file": os.path.basename(xml_file),
+            "product_name": product_name,
+            "section": title,
+            "paragraph": para
+        }
+        for title, para in rows
+    ]
+
+def main():
+    # ------------------------------
+    # Find matching directories. scandir's DirEntry caches is_dir(), so
+    # this avoids one stat syscall per entry compared to listdir + isdir.
+    # ------------------------------
+    directories = [
+        entry.path for entry in os.scandir(base_path)
+        if entry.is_dir() and pattern.match(entry.name)
+    ]
+
+    print(f"Found {len(directories)} matching directories.")
+
+    # ------------------------------
+    # Flatten the file list, then scan files on all cores: each file's
+    # parse + xpath work is independent and CPU-bound on libxml2.
+    # ------------------------------
+    all_xml_files = []
+    for dir_path in directories:
+        all_xml_files.extend(
+            entry.path for entry in os.scandir(dir_path)
+            if entry.name.endswith(".xml") and entry.is_file()
+        )
+
+    # ------------------------------
+    # Stream records to CSV as workers return them, so memory stays O(1)
+    # instead of holding every paragraph of every file at once.
+    # ------------------------------
+    total = 0
+    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        with ProcessPoolExecutor() as executor:
+            for recs in executor.map(extract_records, all_xml_files, chunksize=16):
+                writer.writerows(recs)
+                total += len(recs)
+
+    print(f"Saved {total} records to {OUTPUT_CSV}")
+
+if __name__ == '__main__':
+    main()
@@ -62,11 +62,11 @@ if ! curl -s --head "$FUSEKI_URL" | head -n 1 | grep "200 OK" > /dev/null; then
     exit 1
 fi
 
-# Load the single Drugs@FDA RDF file
+# Load the single Drugs@FDA RDF file (N-Triples)
 echo "Loading Drugs@FDA RDF..."
 curl -s -X POST \
-     -H "Content-Type: application/rdf+xml" \
-     --data-binary @"${RDF_OUT_DIR}/drugsfda.rdf" \
+     -H "Content-Type: application/n-triples" \
+     --data-binary @"${RDF_OUT_DIR}/drugsfda.nt" \
      "$FUSEKI_URL"
 
 # Load all the SPL RDF files
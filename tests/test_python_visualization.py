@@ -2,6 +2,7 @@ import unittest
 import os
 import sys
 import pandas as pd
+import matplotlib.colors
 from unittest.mock import patch, MagicMock, call
 
 # Add the script's directory to the Python path to allow importing
@@ -18,40 +19,42 @@ class TestPythonVisualization(unittest.TestCase):
             'time': [0.0, 0.1, 0.2, 0.3],
             'synaptic_weight': [0.5, 0.55, 0.6, 0.65],
             'pre_activity': [1, 0, 1, 0],
-            'post_activity': [0, 1, 1, 0]
+            'post_activity': [0, 1, 1, 0],
+            'region': ['cortex', 'cortex', 'cortex', 'cortex']
         }
         self.mock_df = pd.DataFrame(self.mock_data)
+        self.mock_arrays = plot_synapse.region_arrays(self.mock_df)
 
         self.test_frames_dir = 'test_frames'
         os.makedirs(self.test_frames_dir, exist_ok=True)
 
-        self.frames_dir_patch = patch('plot_synapse.FRAMES_DIR', self.test_frames_dir)
+        self.frames_dir_patch = patch('plot_synapse.BASE_FRAMES_DIR', self.test_frames_dir)
         self.frames_dir_patch.start()
 
     def tearDown(self):
         """Clean up the test directory."""
         self.frames_dir_patch.stop()
         if os.path.exists(self.test_frames_dir):
-            for f in os.listdir(self.test_frames_dir):
-                os.remove(os.path.join(self.test_frames_dir, f))
+            for root, dirs, files in os.walk(self.test_frames_dir, topdown=False):
+                for f in files:
+                    os.remove(os.path.join(root, f))
+                for d in dirs:
+                    os.rmdir(os.path.join(root, d))
             os.rmdir(self.test_frames_dir)
 
-    @patch('matplotlib.pyplot.savefig')
-    @patch('matplotlib.pyplot.show')
-    @patch('matplotlib.pyplot.close')
-    @patch('matplotlib.pyplot.subplots')
-    def test_unit_plot_simulation_step_runs_without_error(self, mock_subplots, mock_close, mock_show, mock_savefig):
+    def test_unit_renderer_builds_figure_once(self):
         """
-        Unit Test: Ensures plot_simulation_step runs and attempts to save a figure.
+        Unit Test: Ensures the renderer creates its figure and artists once,
+        and that saving several frames does not create new figures.
         """
-        mock_fig = MagicMock()
-        mock_ax = MagicMock()
-        mock_subplots.return_value = (mock_fig, (mock_ax, mock_ax))
-
-        plot_synapse.plot_simulation_step(self.mock_df, step_index=2)
-
-        mock_savefig.assert_called_once()
-        self.assertTrue(mock_close.called)
+        with patch('plot_synapse.plt.subplots', wraps=plot_synapse.plt.subplots) as mock_subplots:
+            renderer = plot_synapse.FrameRenderer(*self.mock_arrays, 'cortex', self.test_frames_dir)
+            try:
+                for i in range(len(self.mock_df)):
+                    renderer.update_frame(i)
+            finally:
+                renderer.close()
+            mock_subplots.assert_called_once()
 
     def test_bdd_given_data_when_plotting_then_frame_is_saved(self):
         """
@@ -60,7 +63,7 @@ class TestPythonVisualization(unittest.TestCase):
         step_index = 1
         expected_frame_path = os.path.join(self.test_frames_dir, f'frame_{step_index:04d}.png')
 
-        plot_synapse.plot_simulation_step(self.mock_df, step_index)
+        plot_synapse.plot_simulation_step(self.mock_df, step_index, 'cortex', self.test_frames_dir)
 
         self.assertTrue(os.path.exists(expected_frame_path))
 
@@ -68,44 +71,42 @@ class TestPythonVisualization(unittest.TestCase):
     @patch('builtins.print')
     def test_main_handles_file_not_found(self, mock_print, mock_exists):
         """Tests that the main function prints an error if the data file is not found."""
-        plot_synapse.main()
+        plot_synapse.main([])
         mock_print.assert_any_call(f"Error: Data file not found at {plot_synapse.DATA_FILE}")
 
-    @patch('plot_synapse.plot_simulation_step')
-    @patch('plot_synapse.pd.read_csv')
+    @patch('plot_synapse.multiprocessing.Pool')
+    @patch('plot_synapse.load_simulation_data')
     @patch('plot_synapse.os.path.exists', return_value=True)
-    def test_main_runs_successfully(self, mock_exists, mock_read_csv, mock_plot_step):
+    def test_main_runs_successfully(self, mock_exists, mock_load_data, mock_pool_cls):
         """Tests the main function's successful execution path."""
-        mock_read_csv.return_value = self.mock_df
+        mock_load_data.return_value = self.mock_df
 
-        plot_synapse.main()
+        plot_synapse.main([])
 
-        self.assertEqual(mock_plot_step.call_count, len(self.mock_df))
-        mock_plot_step.assert_has_calls([
-            call(self.mock_df, 0),
-            call(self.mock_df, 1),
-            call(self.mock_df, 2),
-            call(self.mock_df, 3),
-        ])
+        mock_pool_cls.assert_called_once()
+        mock_pool = mock_pool_cls.return_value.__enter__.return_value
+        map_args = mock_pool.map.call_args
+        self.assertIs(map_args.args[0], plot_synapse._render_frame)
+        self.assertEqual(list(map_args.args[1]), [0, 1, 2, 3])
 
-    @patch('matplotlib.pyplot.Circle')
-    def test_neuron_activity_visualization_colors(self, mock_circle):
+    def test_neuron_activity_visualization_colors(self):
         """Tests that neuron activity circles are colored correctly."""
-        # Step 2: pre_activity=1, post_activity=1 -> both red
-        plot_synapse.plot_simulation_step(self.mock_df, step_index=2)
-        mock_circle.assert_has_calls([
-            call((0.4, 0.5), 0.1, color='red'),
-            call((0.6, 0.5), 0.1, color='red')
-        ], any_order=True)
-
-        mock_circle.reset_mock()
-
-        # Step 1: pre_activity=0, post_activity=1 -> one gray, one red
-        plot_synapse.plot_simulation_step(self.mock_df, step_index=1)
-        mock_circle.assert_has_calls([
-            call((0.4, 0.5), 0.1, color='gray'),
-            call((0.6, 0.5), 0.1, color='red')
-        ], any_order=True)
+        renderer = plot_synapse.FrameRenderer(*self.mock_arrays, 'cortex', self.test_frames_dir)
+        try:
+            red = matplotlib.colors.to_rgba('red')
+            gray = matplotlib.colors.to_rgba('gray')
+
+            # Step 2: pre_activity=1, post_activity=1 -> both red
+            renderer.update_frame(2)
+            self.assertEqual(renderer.pre_circle.get_facecolor(), red)
+            self.assertEqual(renderer.post_circle.get_facecolor(), red)
+
+            # Step 1: pre_activity=0, post_activity=1 -> one gray, one red
+            renderer.update_frame(1)
+            self.assertEqual(renderer.pre_circle.get_facecolor(), gray)
+            self.assertEqual(renderer.post_circle.get_facecolor(), red)
+        finally:
+            renderer.close()
 
 if __name__ == '__main__':
     unittest.main()